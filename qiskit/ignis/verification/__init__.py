@@ -51,7 +51,9 @@ as well as performing interleaved RB, purity RB and RB on the non-Clifford CNOT-
    count_gates
    gates_per_clifford
    coherence_limit
+   make_coherence_limit_fn
    twoQ_clifford_error
+   twoQ_clifford_error_batched
 
 
 Tomography
@@ -101,7 +103,9 @@ from .randomized_benchmarking import (Clifford, BasicUtils, CliffordUtils,
                                       RBFitter, InterleavedRBFitter,
                                       PurityRBFitter, CNOTDihedralRBFitter,
                                       count_gates, gates_per_clifford,
-                                      coherence_limit, twoQ_clifford_error)
+                                      coherence_limit, make_coherence_limit_fn,
+                                      twoQ_clifford_error,
+                                      twoQ_clifford_error_batched)
 from .topological_codes import (RepetitionCode, GraphDecoder,
                                 lookuptable_decoding,
                                 postselection_decoding)
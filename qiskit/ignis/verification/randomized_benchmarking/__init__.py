@@ -27,4 +27,6 @@ from .circuits import randomized_benchmarking_seq
 from .fitters import (RBFitter, InterleavedRBFitter, PurityRBFitter,
                       CNOTDihedralRBFitter)
 from .rb_utils import (count_gates, gates_per_clifford,
-                       coherence_limit, twoQ_clifford_error)
+                       coherence_limit, make_coherence_limit_fn,
+                       twoQ_clifford_error,
+                       twoQ_clifford_error_batched)
@@ -20,7 +20,7 @@ Generates randomized benchmarking sequences
 """
 
 import copy
-from typing import List, Optional
+from typing import List, Optional, Dict
 import numpy as np
 import qiskit
 
@@ -132,11 +132,13 @@ def randomized_benchmarking_seq(nseeds: int = 1,
                                 align_cliffs: bool = False,
                                 interleaved_gates: Optional[List[List[str]]] = None,
                                 is_purity: bool = False,
-                                group_gates: Optional[str] = None) -> \
+                                group_gates: Optional[str] = None,
+                                return_clifford_keys: bool = False) -> \
         (List[List[qiskit.QuantumCircuit]], List[List[int]],
          Optional[List[List[qiskit.QuantumCircuit]]],
          Optional[List[List[List[qiskit.QuantumCircuit]]]],
-         Optional[int]):
+         Optional[int],
+         Optional[Dict[str, Dict[int, List[int]]]]):
     """Generate generic randomized benchmarking (RB) sequences.
 
     Args:
@@ -209,6 +211,10 @@ def randomized_benchmarking_seq(nseeds: int = 1,
             * ``group_gates='1'`` or ``group_gates='CNOT-Dihedral'`` \
             or ``group_gates='Non-Clifford'`` -- CNOT-Dihedral group.
 
+        return_clifford_keys: ``True`` to also return the group keys of the
+            Cliffords in each RB circuit (default is ``False``).
+            Only supported for 1-qubit Clifford RB.
+
     Returns:
         A tuple of different fields depending on the inputs.
         The different fields are:
@@ -231,9 +237,17 @@ def randomized_benchmarking_seq(nseeds: int = 1,
             the number of purity RB circuits (per seed) \
             which equals to :math:`3^n`, where n is the dimension.
 
+         * ``clifford_keys``: (only if ``return_clifford_keys=True``): \
+            dictionary from the name of each RB circuit in ``circuits`` to \
+            the group keys of its Cliffords (including the inverse) per qubit. \
+            It can be passed to \
+            :func:`~qiskit.ignis.verification.randomized_benchmarking.gates_per_clifford`.
+
     Raises:
 
         ValueError: if ``group_gates`` is unknown.
+        ValueError: if ``return_clifford_keys`` is requested for
+            anything else than 1-qubit Clifford RB.
         ValueError: if ``rb_pattern`` is not valid.
         ValueError: if ``length_multiplier`` is not valid.
 
@@ -339,6 +353,13 @@ def randomized_benchmarking_seq(nseeds: int = 1,
     circuits_purity = [[[] for d in range(npurity)]
                        for e in range(nseeds)]
 
+    # group keys of the Cliffords in each circuit, so that gate counts can be
+    # taken from a lookup table
+    if return_clifford_keys and (group_gates_type != 0 or max_nrb != 1):
+        raise ValueError("return_clifford_keys is only supported "
+                         "for 1-qubit Clifford RB.")
+    clifford_keys = {}
+
     # go through for each seed
     for seed in range(nseeds):
         qr = qiskit.QuantumRegister(n_q_max+1, 'qr')
@@ -349,6 +370,7 @@ def randomized_benchmarking_seq(nseeds: int = 1,
         # make sequences for each of the separate sequences in
         # rb_pattern
         Elmnts = []
+        Elmnts_keys = [[] for _ in rb_pattern]
         for rb_q_num in pattern_sizes:
             Elmnts.append(Ggroup(rb_q_num))
         # Sequences for interleaved rb sequences
@@ -366,6 +388,9 @@ def randomized_benchmarking_seq(nseeds: int = 1,
                         rb_q_num)
                     Elmnts[rb_pattern_index] = Gutils.compose_gates(
                         Elmnts[rb_pattern_index], new_elmnt_gatelist)
+                    if return_clifford_keys:
+                        Elmnts_keys[rb_pattern_index].append(
+                            _clifford1_key(new_elmnt_gatelist))
                     general_circ += replace_q_indices(
                         get_quantum_circuit(Gutils.gatelist(),
                                             rb_q_num),
@@ -418,6 +443,7 @@ def randomized_benchmarking_seq(nseeds: int = 1,
                 # circ_interleaved for interleaved rb:
                 circ_interleaved = qiskit.QuantumCircuit(qr, cr)
                 circ_interleaved += interleaved_circ
+                circ_keys = {}
 
                 for (rb_pattern_index, rb_q_num) in enumerate(pattern_sizes):
                     inv_key = Gutils.find_key(Elmnts[rb_pattern_index],
@@ -428,6 +454,10 @@ def randomized_benchmarking_seq(nseeds: int = 1,
                     circ += replace_q_indices(
                         get_quantum_circuit(inv_circuit, rb_q_num),
                         rb_pattern[rb_pattern_index], qr)
+                    if return_clifford_keys:
+                        circ_keys[rb_pattern[rb_pattern_index][0]] = \
+                            Elmnts_keys[rb_pattern_index] + \
+                            [_clifford1_key(inv_circuit)]
                     # calculate the inverse and produce the circuit
                     # for interleaved rb
                     if interleaved_gates is not None:
@@ -516,6 +546,8 @@ def randomized_benchmarking_seq(nseeds: int = 1,
                 circ.name = \
                     rb_circ_type + '_length_%d_seed_%d' % \
                     (length_index, seed + seed_offset)
+                if return_clifford_keys:
+                    clifford_keys[circ.name] = circ_keys
                 circ_interleaved.name = \
                     rb_circ_type + '_interleaved_length_%d_seed_%d' % \
                     (length_index, seed + seed_offset)
@@ -546,19 +578,39 @@ def randomized_benchmarking_seq(nseeds: int = 1,
 
     # output of purity rb
     if is_purity:
-        return circuits_purity, xdata, npurity
+        output = (circuits_purity, xdata, npurity)
     # output of non-clifford cnot-dihedral interleaved rb
-    if interleaved_gates is not None and group_gates_type == 1:
-        return circuits, xdata, circuits_cnotdihedral, circuits_interleaved, \
-               circuits_cnotdihedral_interleaved
+    elif interleaved_gates is not None and group_gates_type == 1:
+        output = (circuits, xdata, circuits_cnotdihedral, circuits_interleaved,
+                  circuits_cnotdihedral_interleaved)
     # output of interleaved rb
-    if interleaved_gates is not None:
-        return circuits, xdata, circuits_interleaved
+    elif interleaved_gates is not None:
+        output = (circuits, xdata, circuits_interleaved)
     # output of Non-Clifford cnot-dihedral rb
-    if group_gates_type == 1:
-        return circuits, xdata, circuits_cnotdihedral
+    elif group_gates_type == 1:
+        output = (circuits, xdata, circuits_cnotdihedral)
     # output of standard (simultaneous) rb
-    return circuits, xdata
+    else:
+        output = (circuits, xdata)
+
+    if return_clifford_keys:
+        return output + (clifford_keys,)
+    return output
+
+
+def _clifford1_key(gatelist):
+    """
+    Return the group key of a 1-qubit Clifford given as a list of gates.
+
+    Args:
+        gatelist: a list of gates.
+
+    Returns:
+        The unique index of the corresponding Clifford object.
+    """
+    # a fresh CliffordUtils, so the state of the one generating the
+    # sequences is left untouched
+    return clutils().clifford_from_gates(1, gatelist).index()
 
 
 def replace_q_indices(circuit, q_nums, qr):
@@ -20,12 +20,55 @@ RB Helper functions
 """
 
 
-from typing import List, Union, Dict
+import math
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import List, Union, Dict, Optional
 from warnings import warn
 
 import numpy as np
-from qiskit import QuantumCircuit
+from qiskit import QuantumCircuit, QiskitError, transpile
 from qiskit.qobj import QasmQobj
+from .circuits import get_quantum_circuit
+from .clifford_utils import CliffordUtils
+
+
+def _tally_loop(qarr, garr, qmap, gmap, out):
+    """Histogram (qubit, gate) pairs into ``out``. Pairs mapped to -1 are skipped."""
+    for k in range(qarr.size):
+        qi = qmap[qarr[k]]
+        gi = gmap[garr[k]]
+        if qi >= 0 and gi >= 0:
+            out[qi, gi] += 1
+
+
+def _tally_numpy(qarr, garr, qmap, gmap, out):
+    """Vectorized fallback of :func:`_tally` when numba is not available."""
+    qi = qmap[qarr]
+    gi = gmap[garr]
+    mask = (qi >= 0) & (gi >= 0)
+    np.add.at(out, (qi[mask], gi[mask]), 1)
+
+
+@lru_cache(maxsize=None)
+def _tally_kernel():
+    """Return the numba compiled :func:`_tally_loop`, or :func:`_tally_numpy`
+    if numba is not installed. numba is only imported, and the kernel only
+    compiled, on first use so that importing this module stays cheap."""
+    try:
+        from numba import njit
+    except ImportError:
+        return _tally_numpy
+
+    return njit(cache=True)(_tally_loop)
+
+
+def _tally(qarr, garr, qmap, gmap, out):
+    """Histogram (qubit, gate) pairs into ``out``. Pairs mapped to -1 are skipped."""
+    _tally_kernel()(qarr, garr, qmap, gmap, out)
 
 
 def count_gates(qobj, basis, qubits):
@@ -54,23 +97,185 @@ def count_gates(qobj, basis, qubits):
     nexp = len(qobj.experiments)
     ngates = np.zeros([nexp, len(qubits), len(basis)], dtype=int)
 
-    basis_ind = {basis[i]: i for i in range(len(basis))}
+    # interned keys let dict lookups on gate names short-circuit on identity
+    basis_ind = {sys.intern(str(base)): i for i, base in enumerate(basis)}
+    qubit_to_row = {qubit: row for row, qubit in enumerate(qubits)}
 
     for i in range(nexp):
+        ni = ngates[i]
+        # flatten the (qubit, gate) hits of this experiment and tally them at once
+        rows = []
+        cols = []
         for instr in qobj.experiments[i].instructions:
-            if instr.name in basis:
-                for qind, qubit in enumerate(qubits):
-                    if qubit in instr.qubits:
-                        ngates[i][qind][basis_ind[instr.name]] += 1
+            col = basis_ind.get(instr.name)
+            if col is None:
+                continue
+            for q in instr.qubits:
+                row = qubit_to_row.get(q)
+                if row is not None:
+                    rows.append(row)
+                    cols.append(col)
+        np.add.at(ni,
+                  (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)),
+                  1)
 
     return ngates
 
 
+def _process_qobj(qobj, counts, qpos, bpos):
+    """Add the basis gate counts of a ``QasmQobj`` to ``counts``."""
+    # TODO: remove this function after deprecation period
+    pairs = Counter()
+    for experiment in qobj.experiments:
+        pairs.update((q_ind, instr.name)
+                     for instr in experiment.instructions
+                     for q_ind in instr.qubits)
+
+    for (q_ind, name), num in pairs.items():
+        row = qpos.get(q_ind)
+        col = bpos.get(name)
+        if row is not None and col is not None:
+            counts[row, col] += num
+
+
+def _extract_soa(circuit, gate_ids):
+    """Flatten ``circuit.data`` into structure-of-arrays form.
+
+    Args:
+        circuit (QuantumCircuit): circuit to flatten.
+        gate_ids (dict): table interning gate names into ints, updated in place.
+
+    Returns:
+        tuple: ``(names, qubit_indices, op_offsets)``, where ``names[k]`` is the
+        interned name of the k-th instruction acting on the qubits
+        ``qubit_indices[op_offsets[k]:op_offsets[k+1]]``.
+    """
+    # resolve qubit positions once per circuit rather than going through
+    # the Bit.index property for every instruction
+    reg_idx = {id(qubit): ind for ind, qubit in enumerate(circuit.qubits)}
+
+    names = []
+    qubits_flat = []
+    offsets = [0]
+    for instr, qregs, _ in circuit.data:
+        names.append(gate_ids.setdefault(instr.name, len(gate_ids)))
+        for qreg in qregs:
+            idx = reg_idx.get(id(qreg))
+            if idx is None:
+                idx = qreg.index
+            qubits_flat.append(idx)
+        offsets.append(len(qubits_flat))
+
+    return (np.asarray(names, dtype=np.int32),
+            np.asarray(qubits_flat, dtype=np.int32),
+            np.asarray(offsets, dtype=np.intp))
+
+
+def _process_qc(circuits, counts, qpos, bpos):
+    """Add the basis gate counts of a list of ``QuantumCircuit`` to ``counts``."""
+    # circuits are flattened into (qubit, gate id) arrays and tallied by a
+    # compiled kernel; gate names are interned into ints on the python side
+    gate_ids = {}
+    qarrs = []
+    garrs = []
+
+    for circuit in circuits:
+        if not isinstance(circuit, QuantumCircuit):
+            raise TypeError('Input object is not `QuantumCircuit`.')
+        names, qubit_indices, op_offsets = _extract_soa(circuit, gate_ids)
+        qarrs.append(qubit_indices)
+        garrs.append(np.repeat(names, np.diff(op_offsets)))
+
+    if not qarrs or not qpos:
+        return
+
+    qarr = np.concatenate(qarrs)
+    garr = np.concatenate(garrs)
+    if not qarr.size:
+        return
+
+    qmap = np.full(max(int(qarr.max()), max(qpos)) + 1, -1, dtype=np.int32)
+    for qubit, row in qpos.items():
+        qmap[qubit] = row
+    gmap = np.full(len(gate_ids), -1, dtype=np.int32)
+    for name, gid in gate_ids.items():
+        gmap[gid] = bpos.get(name, -1)
+    _tally(qarr, garr, qmap, gmap, counts)
+
+
+_CLIFF1Q_GATE_COUNTS = {}
+
+
+def _cliff1q_gate_counts(basis):
+    """Return a lookup table from the group key of each of the 24 single qubit
+    Cliffords to its gate counts once transpiled into ``basis``. The table is
+    populated on the first call for a given basis."""
+    basis_key = tuple(sorted(set(basis)))
+    if basis_key not in _CLIFF1Q_GATE_COUNTS:
+        table = {}
+        for cliff_key, gatelist in CliffordUtils().clifford1_gates_table().items():
+            circuit = transpile(get_quantum_circuit(gatelist, 1),
+                                basis_gates=list(basis_key))
+            table[cliff_key] = Counter(instr.name for instr, _, _ in circuit.data)
+        _CLIFF1Q_GATE_COUNTS[basis_key] = table
+
+    return _CLIFF1Q_GATE_COUNTS[basis_key]
+
+
+def _has_cliff1q_keys(transpiled_circuits_list, clifford_lengths, qubit, clifford_keys):
+    """Check that ``clifford_keys`` holds the 1Q Clifford keys of ``qubit`` for
+    every circuit, as returned by ``randomized_benchmarking_seq``.
+
+    Circuit names repeat across calls of ``randomized_benchmarking_seq``, so the
+    number of keys of each circuit must also match its number of Cliffords,
+    including the inverse."""
+    for transpiled_circuits in transpiled_circuits_list:
+        if len(transpiled_circuits) != len(clifford_lengths):
+            return False
+        for circuit, length in zip(transpiled_circuits, clifford_lengths):
+            if not isinstance(circuit, QuantumCircuit):
+                return False
+            keys = clifford_keys.get(circuit.name, {}).get(qubit)
+            if keys is None or len(keys) != length + 1:
+                return False
+
+    return True
+
+
+def _process_cliff1q(circuits, counts, qpos, bpos, table, clifford_keys):
+    """Add the basis gate counts of a list of 1Q Clifford RB ``QuantumCircuit`` to
+    ``counts`` by looking up the Cliffords recorded in ``clifford_keys`` in
+    ``table``, as returned by :func:`_cliff1q_gate_counts`."""
+    (qubit, row), = qpos.items()
+
+    cliff_keys = Counter()
+    for circuit in circuits:
+        cliff_keys.update(clifford_keys[circuit.name][qubit])
+
+    for cliff_key, ncliff in cliff_keys.items():
+        for name, ngate in table[cliff_key].items():
+            col = bpos.get(name)
+            if col is not None:
+                counts[row, col] += ncliff * ngate
+
+
+def _count_seeds(process, transpiled_circuits_list, qpos, bpos, shape):
+    """Return the gate count array of a list of seeds, tallied with ``process``."""
+    counts = np.zeros(shape, dtype=np.int32)
+    for transpiled_circuits in transpiled_circuits_list:
+        process(transpiled_circuits, counts, qpos, bpos)
+
+    return counts
+
+
 def gates_per_clifford(
         transpiled_circuits_list: Union[List[List[QuantumCircuit]], List[QasmQobj]],
         clifford_lengths: Union[np.ndarray, List[int]],
         basis: List[str],
-        qubits: List[int]) -> Dict[int, Dict[str, float]]:
+        qubits: List[int],
+        n_jobs: int = 1,
+        clifford_keys: Optional[Dict[str, Dict[int, List[int]]]] = None
+) -> Dict[int, Dict[str, float]]:
     """Take a list of transpiled ``QuantumCircuit`` and use these to calculate
     the number of gates per Clifford. Each ``QuantumCircuit`` should be transpiled into
     given ``basis`` set. The result can be used to convert a value of error per Clifford
@@ -118,45 +323,86 @@ def gates_per_clifford(
         clifford_lengths: number of Cliffords in each circuit
         basis: gates basis for the qobj
         qubits: qubits to count over
+        n_jobs: number of worker processes the seeds are distributed over,
+            a positive integer or ``-1`` to use all available CPUs. The seeds
+            are pickled to the workers, which usually costs more than counting
+            them serially, so the default of 1 is normally the fastest.
+        clifford_keys: for 1Q RB circuits, the Clifford keys returned by
+            :func:`randomized_benchmarking_seq` with ``return_clifford_keys=True``.
+            If given, the gate counts are taken from a lookup table of the 24
+            single qubit Cliffords transpiled into ``basis`` instead of walking
+            the circuits. This assumes the circuits were transpiled with the
+            default transpiler settings, without renaming the circuits or
+            remapping the qubit. Keys are matched by circuit name, so they
+            must come from the same call that generated the circuits. If any
+            circuit has no keys, or not one key per Clifford in
+            ``clifford_lengths``, all circuits are counted as usual.
 
     Returns:
         Nested dictionary of gate counts per Clifford.
-    """
-    ngates = {qubit: {base: 0 for base in basis} for qubit in qubits}
 
-    if isinstance(transpiled_circuits_list[0], QasmQobj):
+    Raises:
+        ValueError: if ``clifford_lengths`` is empty or ``n_jobs`` is not a
+            positive integer or -1.
+    """
+    if len(clifford_lengths) == 0:
+        raise ValueError('`clifford_lengths` must not be empty.')
+    if n_jobs != -1 and n_jobs < 1:
+        raise ValueError('`n_jobs` must be a positive integer or -1, got %s.' % n_jobs)
+
+    # counts are accumulated in a dense (qubit, basis gate) array addressed by
+    # integer positions and only converted to the nested dictionary at the end
+    qpos = {qubit: row for row, qubit in enumerate(qubits)}
+    bpos = {base: col for col, base in enumerate(basis)}
+
+    first = transpiled_circuits_list[0]
+    if isinstance(first, QasmQobj):
         warn('`QasmQobj` input will be deprecated. Use transpiled `QuantumCircuit` instead. '
              'Gate counts based on `QasmQobj` has no unittest and may return wrong counts.',
              DeprecationWarning)
-
-    for transpiled_circuits in transpiled_circuits_list:
-        if isinstance(transpiled_circuits, QasmQobj):
-            # TODO: remove this code block after deprecation period
-            for experiment in transpiled_circuits.experiments:
-                for instr in experiment.instructions:
-                    for q_ind in instr.qubits:
-                        try:
-                            ngates[q_ind][instr.name] += 1
-                        except KeyError:
-                            pass
-        else:
-            for transpiled_circuit in transpiled_circuits:
-                if isinstance(transpiled_circuit, QuantumCircuit):
-                    for instr, qregs, _ in transpiled_circuit.data:
-                        for qreg in qregs:
-                            try:
-                                ngates[qreg.index][instr.name] += 1
-                            except KeyError:
-                                pass
-                else:
-                    raise TypeError('Input object is not `QuantumCircuit`.')
+        _process = _process_qobj
+    else:
+        # the QuantumCircuit type is checked per circuit inside _process_qc
+        _process = _process_qc
+        if clifford_keys and len(qubits) == 1 and \
+                _has_cliff1q_keys(transpiled_circuits_list, clifford_lengths,
+                                  qubits[0], clifford_keys):
+            try:
+                # the table is bound here rather than looked up in the
+                # workers, which would rebuild it under spawn/forkserver
+                _process = partial(_process_cliff1q,
+                                   table=_cliff1q_gate_counts(basis),
+                                   clifford_keys=clifford_keys)
+            except QiskitError:
+                # the Cliffords cannot be expressed in this basis
+                pass
+
+    shape = (len(qubits), len(basis))
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+
+    if n_jobs == 1 or len(transpiled_circuits_list) < 2:
+        counts = _count_seeds(_process, transpiled_circuits_list, qpos, bpos, shape)
+    else:
+        # seeds are counted independently, so shards can be tallied in parallel
+        # and the partial counts summed afterwards
+        shards = [transpiled_circuits_list[k::n_jobs] for k in range(n_jobs)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(_count_seeds, _process, shard, qpos, bpos, shape)
+                       for shard in shards if shard]
+            counts = sum(future.result() for future in futures)
 
     # include inverse, ie + 1 for all clifford length
-    total_ncliffs = len(transpiled_circuits_list) * np.sum(np.array(clifford_lengths) + 1)
+    if isinstance(clifford_lengths, np.ndarray):
+        sum_lengths = int(clifford_lengths.sum())
+    else:
+        sum_lengths = sum(clifford_lengths)
+    total_ncliffs = len(transpiled_circuits_list) * (sum_lengths + len(clifford_lengths))
 
-    for qubit in qubits:
-        for base in basis:
-            ngates[qubit][base] /= total_ncliffs
+    inv_ncliffs = 1.0 / total_ncliffs
+    counts = counts.astype(np.float64) * inv_ncliffs
+
+    ngates = {qubit: dict(zip(basis, row)) for qubit, row in zip(qubits, counts.tolist())}
 
     return ngates
 
@@ -178,35 +424,70 @@ def coherence_limit(nQ=2, T1_list=None, T2_list=None,
         coherence limited error per gate.
     """
 
-    T1 = np.array(T1_list)
+    # results are memoized on the (rounded) input values, since fitters tend
+    # to evaluate the limit many times for the same device parameters
+    T1 = _round_times(T1_list)
+    T2 = None if T2_list is None else _round_times(T2_list)
 
-    if T2_list is None:
-        T2 = 2*T1
-    else:
-        T2 = np.array(T2_list)
+    return _coherence_limit_cached(nQ, T1, T2, float(gatelen))
+
+
+def _round_times(times):
+    """Convert a list of times into a hashable tuple of floats, rounded to 12
+    significant figures so that float noise does not cause cache misses."""
+    return tuple(float('%.12g' % time) for time in times)
+
+
+@lru_cache(maxsize=256)
+def _coherence_limit_cached(nQ, T1, T2, gatelen):
+    """Cached :func:`_coherence_limit` on tuples of times."""
+    return _coherence_limit(nQ, T1, T2, gatelen)
+
+
+def _coherence_limit(nQ, T1, T2, gatelen):
+    """Coherence limited error per gate, shared by :func:`coherence_limit` and
+    the functions returned by :func:`make_coherence_limit_fn`."""
+
+    decays1, decays2 = _decay_factors(nQ, T1, T2, -gatelen)
+
+    return _coherence_limit_from_decays(nQ, decays1, decays2)
+
+
+def _decay_factors(nQ, T1, T2, neg_gatelen):
+    """Return the T1 and T2 decay factors ``exp(-gatelen/T)`` of each qubit.
+    If ``T2`` is not given assume T2=2*T1 ."""
+
+    if T2 is None:
+        T2 = [2*time for time in T1]
 
     if len(T1) != nQ or len(T2) != nQ:
         raise ValueError("T1 and/or T2 not the right length")
 
+    return ([math.exp(neg_gatelen/time) for time in T1],
+            [math.exp(neg_gatelen/time) for time in T2])
+
+
+def _coherence_limit_from_decays(nQ, decays1, decays2):
+    """Coherence limited error per gate from the T1 and T2 decay factors
+    ``exp(-gatelen/T)`` of each qubit."""
+
     coherence_limit_err = 0
 
     if nQ == 1:
 
-        coherence_limit_err = 0.5*(1.-2./3.*np.exp(-gatelen/T2[0]) -
-                                   1./3.*np.exp(-gatelen/T1[0]))
+        coherence_limit_err = 0.5*math.fsum([1.,
+                                             -2./3.*decays2[0],
+                                             -1./3.*decays1[0]])
 
     elif nQ == 2:
 
-        T1factor = 0
-        T2factor = 0
-
-        for i in range(2):
-            T1factor += 1./15.*np.exp(-gatelen/T1[i])
-            T2factor += 2./15.*(np.exp(-gatelen/T2[i]) +
-                                np.exp(-gatelen*(1./T2[i]+1./T1[1-i])))
-
-        T1factor += 1./15.*np.exp(-gatelen*np.sum(1/T1))
-        T2factor += 4./15.*np.exp(-gatelen*np.sum(1/T2))
+        # exp(-gatelen*(1/Ta+1/Tb)) = exp(-gatelen/Ta)*exp(-gatelen/Tb), so
+        # the four single qubit decays are the only exponentials needed
+        T1factor = (decays1[0]+decays1[1])/15. + decays1[0]*decays1[1]/15.
+        T2factor = 2.*(decays2[0]+decays2[1] +
+                       decays2[0]*decays1[1] +
+                       decays2[1]*decays1[0])/15. + \
+            4.*decays2[0]*decays2[1]/15.
 
         coherence_limit_err = 0.75*(1.-T1factor-T2factor)
 
@@ -216,6 +497,49 @@ def coherence_limit(nQ=2, T1_list=None, T2_list=None,
     return coherence_limit_err
 
 
+def make_coherence_limit_fn(nQ=2, gatelen=0.1):
+    """
+    Specialize :func:`coherence_limit` to a fixed number of qubits and gate
+    length, for repeated evaluation with varying T1 and T2.
+
+    The number of qubits is checked once and the gate length is fixed, so
+    each call only evaluates one exponential per T1 and T2. Unlike
+    :func:`coherence_limit` the returned function neither rounds nor
+    memoizes its inputs, which suits fits where T1 and T2 change on every
+    call. The most recently used functions are cached per ``(nQ, gatelen)``.
+
+    Args:
+        nQ: number of qubits (1 and 2 supported).
+        gatelen: length of the gate.
+
+    Returns:
+        callable: function ``f(T1_list, T2_list=None)`` returning the
+        coherence limited error per gate. If ``T2_list`` is not given
+        assume T2=2*T1 .
+
+    Raises:
+        ValueError: if ``nQ`` is not a valid number of qubits.
+    """
+
+    if nQ not in (1, 2):
+        raise ValueError('Not a valid number of qubits')
+
+    return _make_coherence_limit_fn(nQ, round(float(gatelen), 15))
+
+
+@lru_cache(maxsize=64)
+def _make_coherence_limit_fn(nQ, gatelen):
+    """Cached body of :func:`make_coherence_limit_fn`."""
+
+    neg_gatelen = -gatelen
+
+    def _coherence_limit_fn(T1_list, T2_list=None):
+        decays1, decays2 = _decay_factors(nQ, T1_list, T2_list, neg_gatelen)
+        return _coherence_limit_from_decays(nQ, decays1, decays2)
+
+    return _coherence_limit_fn
+
+
 def twoQ_clifford_error(ngates, gate_qubit, gate_err):
     """
     The two qubit Clifford gate error given measured errors in the primitive
@@ -230,18 +554,65 @@ def twoQ_clifford_error(ngates, gate_qubit, gate_err):
 
     Returns:
         Error per 2Q Clifford.
+
+    Raises:
+        ValueError: if a value of ``gate_qubit`` is not 0, 1 or -1.
     """
 
     alpha1Q = [1.0, 1.0]
     alpha2Q = 1.0
 
+    # plain python floats: numpy calls on a couple of scalars are pure overhead here
     for gate_ind, ngate in enumerate(ngates):
-        if gate_qubit[gate_ind] == -1:
-            alpha2Q *= (1-4/3*gate_err[gate_ind])**ngate
+        qubit = gate_qubit[gate_ind]
+        if qubit == -1:
+            base = 1.0 - (4.0/3.0)*gate_err[gate_ind]
+            alpha2Q *= base**ngate
+        elif qubit in (0, 1):
+            base = 1.0 - 2.0*gate_err[gate_ind]
+            alpha1Q[qubit] *= base**ngate
         else:
-            alpha1Q[gate_qubit[gate_ind]] *= \
-                (1-2*gate_err[gate_ind])**ngate
+            raise ValueError('gate_qubit values must be 0, 1 or -1, got %s' % qubit)
+
+    alpha2Q_cliff = 0.2*((alpha1Q[0]+alpha1Q[1]) + 3.0*alpha1Q[0]*alpha1Q[1])*alpha2Q
+
+    return (1-alpha2Q_cliff)*3/4
+
+
+def twoQ_clifford_error_batched(ngates, gate_qubit, gate_err):
+    """
+    Vectorized version of :func:`twoQ_clifford_error` evaluating the error
+    per 2Q Clifford for a batch of ``K`` gate count / gate error sets at once,
+    e.g. inside a bootstrap loop of a fitter.
+
+    Args:
+        ngates: array of the number of gates per 2Q Clifford, shape ``(G,)``
+            or ``(K, G)``.
+        gate_qubit: list of the qubit corresponding to the gate (0, 1 or -1),
+            shape ``(G,)``. -1 corresponds to the 2Q gate.
+        gate_err: array of the gate errors, shape ``(G,)`` or ``(K, G)``.
+
+    Returns:
+        np.ndarray: Error per 2Q Clifford, shape ``(K,)``.
+
+    Raises:
+        ValueError: if a value of ``gate_qubit`` is not 0, 1 or -1.
+    """
+
+    ng, er = np.broadcast_arrays(np.atleast_2d(np.asarray(ngates, dtype=float)),
+                                 np.atleast_2d(np.asarray(gate_err, dtype=float)))
+    gq = np.asarray(gate_qubit)
+    if not np.isin(gq, (-1, 0, 1)).all():
+        raise ValueError('gate_qubit values must be 0, 1 or -1, got %s' % gate_qubit)
+
+    m2 = gq == -1
+    m0 = gq == 0
+    m1 = gq == 1
+
+    alpha2Q = np.prod((1-4/3*er[:, m2])**ng[:, m2], axis=-1)
+    alpha1Q_0 = np.prod((1-2*er[:, m0])**ng[:, m0], axis=-1)
+    alpha1Q_1 = np.prod((1-2*er[:, m1])**ng[:, m1], axis=-1)
 
-    alpha2Q_cliff = 1/5*(np.sum(alpha1Q)+3*np.prod(alpha1Q))*alpha2Q
+    alpha2Q_cliff = 0.2*((alpha1Q_0+alpha1Q_1) + 3.0*alpha1Q_0*alpha1Q_1)*alpha2Q
 
     return (1-alpha2Q_cliff)*3/4
@@ -22,6 +22,7 @@ and that it returns the identity
 import itertools
 import random
 import unittest
+from unittest import mock
 
 import numpy as np
 from ddt import ddt, data, unpack
@@ -721,6 +722,101 @@ class TestRBUtils(unittest.TestCase):
         self.assertAlmostEqual(twoq_epc, 0.0446283, 6,
                                "Error: 2Q EPC Calculation")
 
+    def test_make_coherence_limit_fn(self):
+        """Test specialized coherence limit matches coherence_limit."""
+        oneq_fn = rb.rb_utils.make_coherence_limit_fn(1, 0.1)
+        twoq_fn = rb.rb_utils.make_coherence_limit_fn(2, 0.5)
+
+        self.assertIs(twoq_fn, rb.rb_utils.make_coherence_limit_fn(2, 0.5))
+
+        for t1, t2 in [(100., 100.), (50., 80.), (120., None)]:
+            t1_list = [t1, 0.8*t1]
+            t2_list = None if t2 is None else [t2, 1.2*t2]
+            self.assertAlmostEqual(
+                twoq_fn(t1_list, t2_list),
+                rb.rb_utils.coherence_limit(2, t1_list, t2_list, 0.5), 10)
+            self.assertAlmostEqual(
+                oneq_fn(t1_list[:1], None if t2_list is None else t2_list[:1]),
+                rb.rb_utils.coherence_limit(
+                    1, t1_list[:1], None if t2_list is None else t2_list[:1], 0.1), 10)
+
+        with self.assertRaises(ValueError):
+            twoq_fn([100.], [100.])
+        with self.assertRaises(ValueError):
+            oneq_fn([])
+        with self.assertRaises(ValueError):
+            rb.rb_utils.make_coherence_limit_fn(3, 0.5)
+
+    def test_twoQ_clifford_error_batched(self):
+        """Test batched 2Q Clifford error matches the scalar version."""
+        ngates = [[5.2, 5.2, 1.5], [3.1, 4.0, 1.7]]
+        gate_qubit = [0, 1, -1]
+        gate_err = [[0.001, 0.0015, 0.02], [0.002, 0.001, 0.015]]
+
+        batched_epc = rb.rb_utils.twoQ_clifford_error_batched(ngates,
+                                                              gate_qubit,
+                                                              gate_err)
+
+        self.assertEqual(batched_epc.shape, (2,))
+        for ind in range(2):
+            self.assertAlmostEqual(batched_epc[ind],
+                                   rb.rb_utils.twoQ_clifford_error(
+                                       ngates[ind], gate_qubit, gate_err[ind]),
+                                   10)
+        self.assertAlmostEqual(batched_epc[0], 0.0446283, 6,
+                               "Error: batched 2Q EPC Calculation")
+
+        with self.assertRaises(ValueError):
+            rb.rb_utils.twoQ_clifford_error([5.2, 5.2], [0, 2], [0.001, 0.0015])
+        with self.assertRaises(ValueError):
+            rb.rb_utils.twoQ_clifford_error_batched([5.2, 5.2], [0, 2], [0.001, 0.0015])
+
+    def test_count_gates(self):
+        """Test gate counts of an assembled qobj."""
+        circ1 = qiskit.QuantumCircuit(3, 3)
+        circ1.u1(0, 0)
+        circ1.cx(0, 1)
+        circ1.cx(1, 2)
+        circ1.barrier()
+        circ1.measure(0, 0)
+
+        circ2 = qiskit.QuantumCircuit(3, 3)
+        circ2.u2(0, 0, 1)
+        circ2.u1(0, 2)
+        circ2.cx(1, 0)
+        circ2.cx(0, 1)
+        circ2.measure(1, 1)
+
+        qobj = qiskit.assemble([circ1, circ2])
+        with self.assertWarns(DeprecationWarning):
+            ngates = rb.rb_utils.count_gates(qobj, ['u1', 'u2', 'cx'], [0, 1])
+
+        self.assertEqual(ngates.shape, (2, 2, 3))
+        np.testing.assert_array_equal(ngates[0], [[1, 0, 1], [0, 0, 2]])
+        np.testing.assert_array_equal(ngates[1], [[0, 1, 2], [0, 0, 2]])
+
+        with self.assertWarns(DeprecationWarning):
+            ngates_array_basis = rb.rb_utils.count_gates(
+                qobj, np.array(['u1', 'u2', 'cx']), [0, 1])
+        np.testing.assert_array_equal(ngates_array_basis, ngates)
+
+    def test_tally_kernels(self):
+        """Test the compiled and numpy gate tally kernels agree."""
+        rng = np.random.RandomState(42)
+        qarr = rng.randint(0, 5, size=1000).astype(np.int32)
+        garr = rng.randint(0, 6, size=1000).astype(np.int32)
+        qmap = np.array([0, -1, 1, 2, -1], dtype=np.int32)
+        gmap = np.array([0, 1, -1, 2, 3, -1], dtype=np.int32)
+
+        out = np.zeros((3, 4), dtype=np.int32)
+        out_numpy = np.zeros((3, 4), dtype=np.int32)
+        rb.rb_utils._tally(qarr, garr, qmap, gmap, out)
+        rb.rb_utils._tally_numpy(qarr, garr, qmap, gmap, out_numpy)
+
+        np.testing.assert_array_equal(out, out_numpy)
+        self.assertEqual(out.sum(),
+                         np.sum((qmap[qarr] >= 0) & (gmap[garr] >= 0)))
+
     @staticmethod
     def create_fake_circuits(num_gates):
         """Helper function to generate list of circuits with given basis gate numbers."""
@@ -760,6 +856,131 @@ class TestRBUtils(unittest.TestCase):
         self.assertAlmostEqual(gpc[0]['cx'],
                                (num_gates[0][3] + num_gates[1][3]) / ncliffs)
 
+        gpc_array_basis = rb.rb_utils.gates_per_clifford(
+            transpiled_circuits_list=[circs],
+            clifford_lengths=clifford_lengths,
+            basis=np.array(['u1', 'u2', 'u3', 'cx']),
+            qubits=[0])
+        for base in ['u1', 'u2', 'u3', 'cx']:
+            self.assertAlmostEqual(gpc_array_basis[0][base], gpc[0][base])
+
+    def test_gates_per_clifford_parallel(self):
+        """Test gate per Clifford counted over several worker processes."""
+        clifford_lengths = np.array([4, 8])
+        transpiled_circuits_list = [
+            self.create_fake_circuits([[6, 7, 5, 8], [10, 12, 8, 14]]),
+            self.create_fake_circuits([[5, 9, 4, 7], [11, 10, 9, 15]]),
+            self.create_fake_circuits([[7, 6, 6, 9], [9, 13, 7, 13]])]
+        basis = ['u1', 'u2', 'u3', 'cx']
+
+        gpc = rb.rb_utils.gates_per_clifford(
+            transpiled_circuits_list=transpiled_circuits_list,
+            clifford_lengths=clifford_lengths,
+            basis=basis, qubits=[0, 1])
+        gpc_parallel = rb.rb_utils.gates_per_clifford(
+            transpiled_circuits_list=transpiled_circuits_list,
+            clifford_lengths=clifford_lengths,
+            basis=basis, qubits=[0, 1], n_jobs=2)
+
+        for qubit in [0, 1]:
+            for base in basis:
+                self.assertAlmostEqual(gpc[qubit][base], gpc_parallel[qubit][base])
+
+        for n_jobs in [0, -2]:
+            with self.assertRaises(ValueError):
+                rb.rb_utils.gates_per_clifford(
+                    transpiled_circuits_list=transpiled_circuits_list,
+                    clifford_lengths=clifford_lengths,
+                    basis=basis, qubits=[0, 1], n_jobs=n_jobs)
+
+    def test_gates_per_clifford_clifford_table(self):
+        """Test 1Q gate per Clifford from the Clifford lookup table."""
+        basis = ['u1', 'u2', 'u3', 'cx']
+        rb_circs_list, xdata, clifford_keys = rb.randomized_benchmarking_seq(
+            nseeds=2, length_vector=[1, 5, 10], rb_pattern=[[0]],
+            return_clifford_keys=True)
+        transpiled_circuits_list = [qiskit.transpile(rb_circs, basis_gates=basis)
+                                    for rb_circs in rb_circs_list]
+
+        gpc = rb.rb_utils.gates_per_clifford(
+            transpiled_circuits_list=transpiled_circuits_list,
+            clifford_lengths=xdata[0], basis=basis, qubits=[0])
+        # the circuits must not be walked when the lookup table is used
+        with mock.patch.object(rb.rb_utils, '_process_qc',
+                               side_effect=AssertionError('circuits were walked')):
+            gpc_table = rb.rb_utils.gates_per_clifford(
+                transpiled_circuits_list=transpiled_circuits_list,
+                clifford_lengths=xdata[0], basis=basis, qubits=[0],
+                clifford_keys=clifford_keys)
+        self.assertIn(tuple(sorted(basis)), rb.rb_utils._CLIFF1Q_GATE_COUNTS)
+
+        for base in basis:
+            self.assertAlmostEqual(gpc[0][base], gpc_table[0][base])
+
+        # keys of another call share the circuit names, but not the lengths,
+        # so the circuits are walked instead
+        _, _, other_keys = rb.randomized_benchmarking_seq(
+            nseeds=2, length_vector=[2, 5, 10], rb_pattern=[[0]],
+            return_clifford_keys=True)
+        with mock.patch.object(rb.rb_utils, '_process_qc',
+                               wraps=rb.rb_utils._process_qc) as process_qc:
+            gpc_other = rb.rb_utils.gates_per_clifford(
+                transpiled_circuits_list=transpiled_circuits_list,
+                clifford_lengths=xdata[0], basis=basis, qubits=[0],
+                clifford_keys=other_keys)
+        self.assertTrue(process_qc.called)
+        self.assertEqual(gpc, gpc_other)
+
+        with self.assertRaises(ValueError):
+            rb.randomized_benchmarking_seq(nseeds=1, length_vector=[1],
+                                           rb_pattern=[[0, 1]],
+                                           return_clifford_keys=True)
+
+    def test_gates_per_clifford_qobj(self):
+        """Test deprecated gate per Clifford from QasmQobj input."""
+        num_gates = [[6, 7, 5, 8], [10, 12, 8, 14]]
+        clifford_lengths = np.array([4, 8])
+        basis = ['u1', 'u2', 'u3', 'cx']
+
+        circs = self.create_fake_circuits(num_gates)
+        qobj = qiskit.assemble(circs)
+        with self.assertWarns(DeprecationWarning):
+            gpc = rb.rb_utils.gates_per_clifford(transpiled_circuits_list=[qobj],
+                                                 clifford_lengths=clifford_lengths,
+                                                 basis=basis, qubits=[0, 1])
+        ncliffs = np.sum(clifford_lengths + 1)
+
+        for ind, base in enumerate(basis):
+            self.assertAlmostEqual(gpc[0][base],
+                                   (num_gates[0][ind] + num_gates[1][ind]) / ncliffs)
+        self.assertAlmostEqual(gpc[1]['u1'], 0)
+        self.assertAlmostEqual(gpc[1]['cx'], (num_gates[0][3] + num_gates[1][3]) / ncliffs)
+
+    def test_gates_per_clifford_input_types(self):
+        """Test gate per Clifford with an empty seed and non-circuit input."""
+        circs = self.create_fake_circuits([[6, 7, 5, 8], [10, 12, 8, 14]])
+        basis = ['u1', 'u2', 'u3', 'cx']
+
+        gpc = rb.rb_utils.gates_per_clifford(transpiled_circuits_list=[[], circs],
+                                             clifford_lengths=[4, 8],
+                                             basis=basis, qubits=[0])
+        self.assertAlmostEqual(gpc[0]['cx'], 22 / 28)
+
+        with self.assertRaises(TypeError):
+            rb.rb_utils.gates_per_clifford(transpiled_circuits_list=[circs + ['not a circuit']],
+                                           clifford_lengths=[4, 8],
+                                           basis=basis, qubits=[0])
+
+        with self.assertRaises(ValueError):
+            rb.rb_utils.gates_per_clifford(transpiled_circuits_list=[circs],
+                                           clifford_lengths=[],
+                                           basis=basis, qubits=[0])
+
+        gpc = rb.rb_utils.gates_per_clifford(transpiled_circuits_list=[circs],
+                                             clifford_lengths=[4, 8],
+                                             basis=basis, qubits=[])
+        self.assertEqual(gpc, {})
+
     def test_gates_per_clifford_with_invalid_basis(self):
         """Test gate per Clifford when invalid gate is included in basis."""
         num_gates = [[1, 1, 1, 1]]